@@ -2,10 +2,19 @@ import streamlit as st
 import yt_dlp
 import os
 import tempfile
-import re
-import requests
+import hashlib
+import functools
+import shutil
+import queue
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+# Pure helpers live in a module so they are compiled once per process
+# instead of being re-executed on every Streamlit rerun
+from subtitle_utils import convert_subtitle, sanitize_filename
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -15,190 +24,90 @@ st.set_page_config(
 )
 
 # --- Custom Styles (HTML/CSS/JS) ---
-st.markdown("""
-    <style>
-    /* Import Google Font */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-
-    /* Global Styles */
-    html, body, [class*="css"] {
-        font-family: 'Inter', sans-serif;
-    }
-
-    /* Modern Dark Background */
-    .stApp {
-        background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
-        color: #e2e8f0;
-    }
-
-    /* Title Styling */
-    h1 {
-        background: linear-gradient(to right, #4facfe 0%, #00f2fe 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-weight: 800 !important;
-        letter-spacing: -1px;
-    }
-    
-    h3 {
-        color: #94a3b8 !important;
-    }
-
-    /* Input Fields */
-    .stTextInput > div > div > input {
-        background-color: #1e293b;
-        color: white;
-        border: 1px solid #334155;
-        border-radius: 12px;
-        padding: 12px;
-        transition: border-color 0.3s ease;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #38bdf8;
-        box-shadow: 0 0 0 2px rgba(56, 189, 248, 0.2);
-    }
-
-    /* Styled Buttons */
-    .stButton > button {
-        background: linear-gradient(90deg, #3b82f6 0%, #2563eb 100%);
-        color: white;
-        border: none;
-        padding: 0.6rem 1.2rem;
-        border-radius: 10px;
-        font-weight: 600;
-        width: 100%;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06);
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 10px 15px -3px rgba(37, 99, 235, 0.4);
-        background: linear-gradient(90deg, #2563eb 0%, #1d4ed8 100%);
-    }
-
-    /* Card/Expander Styling */
-    div[data-testid="stExpander"] {
-        background-color: #1e293b;
-        border: 1px solid #334155;
-        border-radius: 12px;
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-    }
-
-    /* Selectbox styling */
-    div[data-baseweb="select"] > div {
-        background-color: #1e293b;
-        border-color: #334155;
-        border-radius: 10px;
-        color: white !important;
-    }
-
-    /* Images */
-    img {
-        border-radius: 16px;
-        box-shadow: 0 20px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
-        border: 1px solid #334155;
-    }
-    
-    /* Custom divider */
-    hr {
-        margin: 2em 0;
-        border-color: #334155;
-    }
-    
-    /* Footer */
-    .footer-text {
-        text-align: center;
-        color: #64748b;
-        font-size: 0.875rem;
-    }
-
-    /* Radio button labels */
-    .stRadio label {
-        color: #e2e8f0 !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+# Served from static/app.css (see .streamlit/config.toml) so the browser caches
+# the stylesheet instead of receiving it again on every rerun
+st.markdown('<link rel="stylesheet" href="app/static/app.css">', unsafe_allow_html=True)
 
 # --- Helper Functions ---
 
-def sanitize_filename(name):
-    """Sanitize the string to be safe for filenames."""
-    return re.sub(r'[\\/*?:"<>|]', "", name)
-
-def vtt_to_srt(vtt_text: str) -> str:
-    """Natively converts WebVTT text to SubRip (SRT) format without FFmpeg."""
-    # 1. Remove WEBVTT header and metadata
-    text = re.sub(r'^WEBVTT.*?(\n\n|\r\n\r\n)', '', vtt_text, flags=re.DOTALL)
-    
-    # 2. Convert timestamps: 00:00.000 -> 00:00:00,000
-    # Handle both MM:SS.mmm and HH:MM:SS.mmm
-    def fix_timestamp(match):
-        ts = match.group(0).replace('.', ',')
-        if len(ts.split(':')[0]) == 2 and ts.count(':') == 1:
-            return "00:" + ts
-        return ts
-
-    text = re.sub(r'\d{1,2}:\d{2}[\.,]\d{3}', fix_timestamp, text)
-    
-    # 3. Process blocks into SRT segments
-    lines = text.splitlines()
-    srt_blocks = []
-    block_id = 1
-    current_block = []
-    
-    for line in lines:
-        if ' --> ' in line:
-            # New segment start
-            if current_block:
-                srt_blocks.append(f"{block_id}\n" + "\n".join(current_block).strip() + "\n")
-                block_id += 1
-                current_block = []
-            current_block.append(line)
-        elif line.strip():
-            current_block.append(line)
-            
-    # Add last block
-    if current_block:
-        srt_blocks.append(f"{block_id}\n" + "\n".join(current_block).strip() + "\n")
-        
-    return "\n".join(srt_blocks).strip()
-
-def strip_timestamps(text: str) -> str:
-    """Removes VTT/SRT timestamps and metadata for a clean transcript."""
-    # Remove WEBVTT header
-    text = re.sub(r'WEBVTT\n.*?\n\n', '', text, flags=re.DOTALL)
-    # Remove timestamps (VTT: 00:00:00.000 --> 00:00:00.000, SRT: 00:00:00,000 --> 00:00:00,000)
-    text = re.sub(r'\d{1,2}:\d{2}:\d{2}[\.,]\d{3} --> \d{1,2}:\d{2}:\d{2}[\.,]\d{3}.*?\n', '', text)
-    # Remove HTML-like tags
-    text = re.sub(r'<[^>]*>', '', text)
-    # Remove leading sequence numbers from SRT
-    text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)
-    # Collapse multiple newlines
-    text = re.sub(r'\n+', '\n', text)
-    return text.strip()
-
-def get_info(url: str, cookies_path: Optional[str] = None):
-    """Extracts video information using yt-dlp."""
-    ydl_opts = {
-        'skip_download': True,
-        'quiet': True,
-        'no_warnings': True,
-        'listsubtitles': True,
-        'cookiefile': cookies_path if cookies_path else None
-    }
+def _remove_file(path: str) -> None:
+    """Deletes a cached temp file when its cache entry is released."""
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            return ydl.extract_info(url, download=False)
+        os.remove(path)
+    except OSError:
+        pass
+
+@st.cache_resource(scope="session", on_release=_remove_file, validate=os.path.isfile, show_spinner=False)
+def _cookie_file_path(cookies_hash: str, _upload) -> str:
+    """Writes uploaded cookies to a temp file once per session and content hash.
+
+    Reruns reuse the same path, and the file is removed when the session ends.
+    On Linux it goes to tmpfs (/dev/shm) so cookies never touch the disk.
+    """
+    _upload.seek(0)
+    tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".txt", dir=tmp_dir) as tmp:
+        shutil.copyfileobj(_upload, tmp)
+        return tmp.name
+
+_INFO_OPTS = {
+    'skip_download': True,
+    'quiet': True,
+    'no_warnings': True,
+    'listsubtitles': True,
+}
+
+# Instances kept idle for reuse; bursts beyond this are built and closed per call
+_INFO_POOL_MAX = 4
+
+@st.cache_resource
+def _info_ydl_pool() -> queue.SimpleQueue:
+    """Process-wide pool of cookie-less metadata YoutubeDL instances.
+
+    Constructing YoutubeDL registers every extractor (~50 ms). A pool rather than
+    one shared instance keeps concurrent sessions from using the same object.
+    """
+    return queue.SimpleQueue()
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _extract_info(url: str, cookies_hash: Optional[str], _cookies_path: Optional[str]):
+    """Cached metadata lookup. Cookies are keyed by content hash since the temp path changes every run."""
+    if _cookies_path:
+        # Cookie jars are per user, so these instances are never pooled
+        with yt_dlp.YoutubeDL({**_INFO_OPTS, 'cookiefile': _cookies_path}) as ydl:
+            return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+    pool = _info_ydl_pool()
+    try:
+        ydl = pool.get_nowait()
+    except queue.Empty:
+        ydl = yt_dlp.YoutubeDL(_INFO_OPTS)
+    try:
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+    finally:
+        # Sites set cookies during extraction; drop them so sessions stay isolated
+        ydl.cookiejar.clear()
+        if pool.qsize() < _INFO_POOL_MAX:
+            pool.put(ydl)
+        else:
+            ydl.close()
+
+def get_info(url: str, cookies_path: Optional[str] = None, cookies_hash: Optional[str] = None):
+    """Extracts video information using yt-dlp (cached per URL and cookies)."""
+    try:
+        return _extract_info(url, cookies_hash, cookies_path)
     except Exception as e:
         st.error(f"Extraction Error: {str(e)}")
         return None
 
 # --- Unified Processing Logic ---
 
-def process_subtitles(url: str, sub_code: str, is_auto: bool, cookies_path: str, format_choice: str) -> Tuple[Optional[bytes], str]:
-    """Handles download and native conversion for both YouTube and general sources."""
+@st.cache_data(ttl=1800, max_entries=64, show_spinner=False)
+def _fetch_raw(url: str, sub_codes: Tuple[str, ...], is_auto: bool, cookies_hash: Optional[str], _cookies_path: Optional[str]) -> Tuple[Dict[str, Tuple[bytes, str]], str]:
+    """Downloads subtitle tracks in one yt-dlp run, returning ({code: (raw_bytes, ext)}, title).
+
+    Cached so format changes skip yt-dlp.
+    """
     with tempfile.TemporaryDirectory() as tmpdir:
         # We download the raw format (usually vtt) and convert it in Python
         outtmpl = os.path.join(tmpdir, 'subtitle.%(ext)s')
@@ -207,77 +116,119 @@ def process_subtitles(url: str, sub_code: str, is_auto: bool, cookies_path: str,
             'skip_download': True,
             'writesubtitles': not is_auto,
             'writeautomaticsub': is_auto,
-            'subtitleslangs': [sub_code],
+            'subtitleslangs': list(sub_codes),
+            # Prefer VTT so SRT output always goes through the native converter
+            'subtitlesformat': 'vtt/srt/best',
             'outtmpl': outtmpl,
-            'cookiefile': cookies_path if cookies_path else None,
+            'cookiefile': _cookies_path if _cookies_path else None,
             'quiet': True,
             'no_warnings': True,
+            # A failing language must not abort the run and discard the others;
+            # its missing file is reported as a missing track below
+            'ignoreerrors': True,
         }
 
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+        # With ignoreerrors, a failed extraction returns None instead of raising
+        if info is None:
+            raise FileNotFoundError("Subtitle extraction failed")
+        video_title = info.get('title', 'subtitles')
+            
+        # yt-dlp records where each written track went, so no directory scan is needed
+        tracks = {}
+        for code, sub in (info.get('requested_subtitles') or {}).items():
+            path = sub.get('filepath')
+            if path and os.path.isfile(path):
+                with open(path, 'rb') as fh:
+                    tracks[code] = (fh.read(), os.path.splitext(path)[1])
+        
+        # Raised rather than returned so a missing track is not cached
+        if not tracks:
+            raise FileNotFoundError("No subtitle file was downloaded")
+
+        return tracks, video_title
+
+def process_subtitles(url: str, selections: List[dict], cookies_path: str, format_choice: str, cookies_hash: Optional[str] = None) -> Tuple[Optional[bytes], str]:
+    """Handles download and native conversion; several tracks are bundled into one ZIP."""
+    tracks = []
+    missing = []
+    video_title = "subtitles"
+    # One yt-dlp run per caption kind instead of one per language
+    groups = {}
+    for s in selections:
+        groups.setdefault(s['auto'], []).append(s['code'])
+
+    def fetch_args(is_auto):
+        return url, tuple(groups[is_auto]), is_auto, cookies_hash, cookies_path
+
+    def fetch(is_auto):
+        return _fetch_raw(*fetch_args(is_auto))
+
+    # The (at most two) runs are independent network I/O, so they overlap, except
+    # with cookies: yt-dlp truncates and rewrites the cookie file on close, so
+    # runs sharing one must not overlap
+    if len(groups) > 1 and not cookies_path:
+        with ThreadPoolExecutor(max_workers=len(groups)) as ex:
+            pending = {is_auto: ex.submit(fetch, is_auto) for is_auto in groups}
+        results = {is_auto: future.result for is_auto, future in pending.items()}
+    else:
+        results = {is_auto: functools.partial(fetch, is_auto) for is_auto in groups}
+
+    for is_auto in (False, True):
+        if is_auto not in results:
+            continue
+        # Errors are handled per caption kind so one failing run keeps the other's tracks
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                video_title = info.get('title', 'subtitles')
-                
-                files = os.listdir(tmpdir)
-                if not files:
-                    return None, ""
-                
-                # Find the downloaded subtitle file (vtt, ttml, etc)
-                source_file = None
-                subtitle_exts = ('.vtt', '.srt', '.ttml', '.json3', '.ass', '.ssa')
-                for f in files:
-                    if f.endswith(subtitle_exts):
-                        source_file = f
-                        break
-                
-                if not source_file:
-                    return None, ""
-
-                source_path = os.path.join(tmpdir, source_file)
-                
-                with open(source_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    raw_content = f.read()
-                
-                # Handle Output Selection
-                if format_choice == "SRT":
-                    # Native VTT to SRT conversion (replaces FFmpeg dependency)
-                    if source_file.endswith('.vtt'):
-                        content = vtt_to_srt(raw_content)
-                    else:
-                        content = raw_content # Already srt or other
-                    
-                    final_name = f"{sanitize_filename(video_title)}.srt"
-                    return content.encode('utf-8'), final_name
-
-                elif format_choice == "Clean TXT":
-                    content = strip_timestamps(raw_content)
-                    final_name = f"{sanitize_filename(video_title)}.txt"
-                    return content.encode('utf-8'), final_name
-                
-                else:
-                    # Raw (VTT)
-                    actual_ext = os.path.splitext(source_file)[1]
-                    final_name = f"{sanitize_filename(video_title)}{actual_ext}"
-                    return raw_content.encode('utf-8'), final_name
-                    
+            raw, video_title = results[is_auto]()
+        except FileNotFoundError:
+            raw = {}
         except Exception as e:
             st.error(f"Processing failed: {e}")
-            return None, ""
+            raw = {}
+        group_missing = [code for code in groups[is_auto] if code not in raw]
+        if raw and group_missing:
+            # Partial results are not kept, so a retry downloads the failed tracks again
+            _fetch_raw.clear(*fetch_args(is_auto))
+        missing.extend(group_missing)
+        tracks.extend((code, is_auto, *raw[code]) for code in groups[is_auto] if code in raw)
+
+    if missing:
+        st.warning(f"No subtitles could be downloaded for: {', '.join(missing)}")
+
+    if not tracks:
+        return None, ""
+
+    base_name = sanitize_filename(video_title)
+    # Decided by what was requested, so a partial result still names each language
+    if len(selections) == 1:
+        _, _, raw_bytes, ext = tracks[0]
+        data, out_ext = convert_subtitle(raw_bytes, ext, format_choice)
+        return data, f"{base_name}{out_ext}"
+
+    # Subtitle text is small, so entries are stored rather than deflated
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_STORED) as zf:
+        for code, is_auto, raw_bytes, ext in tracks:
+            data, out_ext = convert_subtitle(raw_bytes, ext, format_choice)
+            kind = ".auto" if is_auto else ""
+            zf.writestr(f"{base_name}.{code}{kind}{out_ext}", data)
+    return buf.getvalue(), f"{base_name}.zip"
 
 # --- UI Renderers ---
 
-def render_download_options(info, url, cookies_path):
+def render_download_options(info, url, cookies_path, cookies_hash=None):
     st.subheader("⚙️ Download Options")
     
     manual = info.get('subtitles', {})
     auto = info.get('automatic_captions', {})
     
-    options = []
-    for k, v in manual.items():
-        options.append({"label": f"✅ {v[0].get('name', k)} (Manual)", "code": k, "auto": False})
-    for k, v in auto.items():
-        options.append({"label": f"🤖 {v[0].get('name', k)} (Auto)", "code": k, "auto": True})
+    # Single walk over both track kinds: manual first, then auto
+    options = [
+        {"label": f"{icon} {v[0].get('name', k)} ({kind})", "code": k, "auto": is_auto}
+        for tracks, icon, kind, is_auto in ((manual, "✅", "Manual", False), (auto, "🤖", "Auto", True))
+        for k, v in tracks.items()
+    ]
     
     if not options:
         st.warning("No subtitles detected for this video.")
@@ -286,10 +237,12 @@ def render_download_options(info, url, cookies_path):
     col_lang, col_fmt = st.columns(2)
     
     with col_lang:
-        selection = st.selectbox(
-            "1. Choose Language", 
+        selections = st.multiselect(
+            "1. Choose Language(s)", 
             options, 
-            format_func=lambda x: x['label']
+            default=options[:1],
+            format_func=lambda x: x['label'],
+            help="Selecting several languages downloads them together as a ZIP."
         )
     
     with col_fmt:
@@ -301,13 +254,16 @@ def render_download_options(info, url, cookies_path):
         )
         
     if st.button("🚀 Generate Download Link"):
+        if not selections:
+            st.warning("Select at least one language.")
+            return
         with st.spinner("Converting subtitles..."):
             data, name = process_subtitles(
                 url, 
-                selection['code'], 
-                selection['auto'], 
+                selections, 
                 cookies_path, 
-                format_choice
+                format_choice,
+                cookies_hash
             )
             
             if data:
@@ -317,7 +273,7 @@ def render_download_options(info, url, cookies_path):
                     label=f"💾 Download {name}",
                     data=data,
                     file_name=name,
-                    mime=mime_map.get(format_choice, "text/plain")
+                    mime="application/zip" if name.endswith(".zip") else mime_map.get(format_choice, "text/plain")
                 )
             else:
                 st.error("Extraction failed. This video might not support the selected format.")
@@ -348,13 +304,16 @@ url_input = st.text_input("Paste Video Link:", placeholder="https://www.youtube.
 
 if url_input:
     cookies_path = None
+    cookies_hash = None
     if use_cookies and cookie_file:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp:
-            tmp.write(cookie_file.getvalue())
-            cookies_path = tmp.name
+        # Hash the upload without an extra in-memory copy; the file itself is
+        # written only once per session for each distinct cookies.txt
+        cookie_file.seek(0)
+        cookies_hash = hashlib.file_digest(cookie_file, 'sha1').hexdigest()
+        cookies_path = _cookie_file_path(cookies_hash, cookie_file)
 
     with st.spinner("Analyzing video metadata..."):
-        info = get_info(url_input, cookies_path)
+        info = get_info(url_input, cookies_path, cookies_hash)
 
     if info:
         # Common Info Display
@@ -385,14 +344,7 @@ if url_input:
         st.divider()
 
         # Download UI
-        render_download_options(info, url_input, cookies_path)
-
-    # Cleanup Cookies
-    if cookies_path and os.path.exists(cookies_path):
-        try:
-            os.remove(cookies_path)
-        except:
-            pass
+        render_download_options(info, url_input, cookies_path, cookies_hash)
 
 st.markdown("---")
 st.markdown("<p class='footer-text'>Developed with ❤️ using Streamlit & yt-dlp</p>", unsafe_allow_html=True)
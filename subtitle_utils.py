@@ -0,0 +1,121 @@
+import io
+import re
+from typing import Iterable, Iterator, Tuple
+
+# --- Precompiled Patterns ---
+_BAD_FN = str.maketrans('', '', '\\/*?:"<>|')
+# Tag bodies exclude '<' so unmatched '<' cannot make the scan quadratic
+_RE_TAG = re.compile(r'<[^<>]*>')
+
+# --- Helper Functions ---
+
+def sanitize_filename(name):
+    """Sanitize the string to be safe for filenames."""
+    return name.translate(_BAD_FN)
+
+def _skip_vtt_header(lines: Iterable[str]) -> Iterator[str]:
+    """Yields lines without line endings, dropping a leading WEBVTT header block."""
+    # Only the first line is inspected, so the header costs O(prefix) and no regex
+    lines = iter(lines)
+    for line in lines:
+        line = line.lstrip('\ufeff')
+        if line.startswith('WEBVTT'):
+            # Header and metadata run until the first blank line
+            for line in lines:
+                if not line.rstrip('\r\n'):
+                    break
+        else:
+            yield line.rstrip('\r\n')
+        break
+    for line in lines:
+        yield line.rstrip('\r\n')
+
+def _srt_time(ts: str) -> str:
+    """Converts a VTT timestamp (MM:SS.mmm or H:MM:SS.mmm) to SRT (HH:MM:SS,mmm)."""
+    ts = ts.replace('.', ',')
+    if ts.count(':') == 1:
+        return "00:" + ts
+    if ts.index(':') == 1:
+        return "0" + ts
+    return ts
+
+def _srt_timing(line: str) -> str:
+    """Rewrites a cue timing line with plain string ops (no per-match regex callback)."""
+    start, _, rest = line.partition(' --> ')
+    end, sep, settings = rest.strip().partition(' ')
+    return f"{_srt_time(start.strip())} --> {_srt_time(end)}{sep}{settings}"
+
+def _srt_from_lines(lines: Iterable[str]) -> bytes:
+    """Single-pass WebVTT to SRT conversion over any iterable of lines, returning UTF-8 bytes."""
+    # Output is encoded straight into one buffer; a list of small str tokens
+    # cost several times the file size in peak memory
+    out = bytearray()
+    block_id = 0
+
+    for line in _skip_vtt_header(lines):
+        # Strip once per line and skip blanks before any substring search
+        line = line.rstrip()
+        if not line:
+            continue
+        if ' --> ' in line:
+            # New segment start
+            block_id += 1
+            out += (f"\n\n{block_id}\n" if block_id > 1 else "1\n").encode('ascii')
+            out += _srt_timing(line).encode('utf-8')
+        elif block_id:
+            # Text before the first cue (NOTE/STYLE blocks) has no timing and is dropped
+            out += b"\n"
+            out += line.encode('utf-8')
+
+    return bytes(out)
+
+def _transcript_from_lines(lines: Iterable[str]) -> bytes:
+    """Extracts a clean transcript from any iterable of lines, returning UTF-8 bytes."""
+    # Kept lines are encoded straight into one buffer, as in _srt_from_lines;
+    # inline tags are stripped per line, and only on lines that contain '<'
+    out = bytearray()
+    in_cues = False
+    for line in _skip_vtt_header(lines):
+        if ' --> ' in line:
+            # Text before the first cue (NOTE/STYLE blocks) is dropped, as in SRT
+            # output; sources without cue timings (TTML/DFXP) keep all their text
+            if not in_cues:
+                in_cues = True
+                out.clear()
+            continue
+        if '<' in line:
+            line = _RE_TAG.sub('', line)
+        stripped = line.strip()
+        # Drop SRT sequence numbers and blank lines
+        if not stripped or stripped.isdecimal():
+            continue
+        if out:
+            out += b"\n"
+            out += line.encode('utf-8')
+        else:
+            out += line.lstrip().encode('utf-8')
+    return bytes(out).rstrip()
+
+def _decoded_lines(raw_bytes: bytes) -> Iterable[str]:
+    """Lazily decodes downloaded bytes line by line instead of materializing the full text."""
+    return io.TextIOWrapper(io.BytesIO(raw_bytes), encoding='utf-8', errors='ignore')
+
+# --- Format Conversion ---
+
+def convert_subtitle(raw_bytes: bytes, ext: str, format_choice: str) -> Tuple[bytes, str]:
+    """Converts downloaded subtitle bytes to the chosen output, returning (data, extension).
+
+    Only the converting paths decode; pass-through output is returned as downloaded.
+    """
+    if format_choice == "SRT":
+        # Native VTT to SRT conversion (replaces FFmpeg dependency)
+        if ext == '.vtt':
+            return _srt_from_lines(_decoded_lines(raw_bytes)), ".srt"
+        return raw_bytes, ".srt" # Already srt or other
+
+    elif format_choice == "Clean TXT":
+        return _transcript_from_lines(_decoded_lines(raw_bytes)), ".txt"
+    
+    else:
+        # Raw (VTT)
+        return raw_bytes, ext